@@ -37,6 +37,7 @@ from .animation import *
 from .modify import *
 from .util import *
 from .addon import addon
+from .messaging import handle
 
 
 bl_info = {
@@ -167,6 +168,7 @@ def register():
 def unregister():
     if addon.server_up:
         addon.stop_server()
+    free_uv_offscreen()
 
     if bpy.app.timers.is_registered(start):
         bpy.app.timers.unregister(start)
@@ -183,6 +185,12 @@ def unregister():
     if sb_on_depsgraph_update_post in bpy.app.handlers.depsgraph_update_post:
         bpy.app.handlers.depsgraph_update_post.remove(sb_on_depsgraph_update_post)
 
+    if sb_on_undo_redo in bpy.app.handlers.undo_post:
+        bpy.app.handlers.undo_post.remove(sb_on_undo_redo)
+
+    if sb_on_undo_redo in bpy.app.handlers.redo_post:
+        bpy.app.handlers.redo_post.remove(sb_on_undo_redo)
+
     try:
         editor_menus = bpy.types.IMAGE_MT_editor_menus
     except AttributeError:
@@ -226,10 +234,20 @@ def start():
     if sb_on_depsgraph_update_post not in bpy.app.handlers.depsgraph_update_post:
         bpy.app.handlers.depsgraph_update_post.append(sb_on_depsgraph_update_post)
 
+    if sb_on_undo_redo not in bpy.app.handlers.undo_post:
+        bpy.app.handlers.undo_post.append(sb_on_undo_redo)
+
+    if sb_on_undo_redo not in bpy.app.handlers.redo_post:
+        bpy.app.handlers.redo_post.append(sb_on_undo_redo)
+
 
 @persistent
 def sb_on_load_post(scene):
     props.migrate()
+    props.clear_cache()
+    util.forget_image_digests() # names can repeat across files
+    addon.invalidate_image_index()
+    addon.invalidate_sprite_actions()
 
     global _images_hv
     _images_hv = hash(frozenset(img.sb_props.sync_name for img in bpy.data.images))
@@ -248,6 +266,15 @@ def sb_on_load_post(scene):
 def sb_on_load_pre(scene):
     if addon.server_up:
         addon.stop_server()
+    handle.clear_scratch_buffers()
+
+
+@persistent
+def sb_on_undo_redo(scene):
+    # undo replaces blender data, so references to it are no longer valid
+    addon.invalidate_image_index()
+    addon.invalidate_sprite_actions()
+    util.forget_image_digests() # undo restores older pixels
 
 
 @persistent
@@ -262,11 +289,17 @@ def sb_on_depsgraph_update_post(scene):
 
     dg = bpy.context.evaluated_depsgraph_get()
 
+    if dg.id_type_updated('ACTION'):
+        addon.invalidate_sprite_actions()
+
     if dg.id_type_updated('IMAGE'):
         imgs = frozenset(img.sb_props.sync_name for img in bpy.data.images)
         hv = hash(imgs)
 
         if _images_hv != hv:
             _images_hv = hv
+            # images sync updates tag images as well, only rebuild the index when the names change
+            addon.invalidate_image_index()
+            util.forget_image_digests() # an image might've been replaced by another one with the same name
             if addon.server_up:
                 addon.server.send(encode.texture_list(addon.state.identifier, addon.texture_list))
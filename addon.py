@@ -34,6 +34,12 @@ class Addon:
         self._server = None
         self.watch = None
         self.active_sprite = None
+        self._image_index = None
+        self._image_index_size = 0
+        self._sheet_images = None
+        self._sheet_images_size = 0
+        self._sprite_actions = None
+        self._sprite_actions_size = 0
 
 
     @property
@@ -64,6 +70,10 @@ class Addon:
         """Stop server instance"""
         self._server.stop()
         self._server = None
+        handle.clear_scratch_buffers()
+
+        from .image import free_uv_offscreen
+        free_uv_offscreen()
 
 
     @property
@@ -81,9 +91,76 @@ class Addon:
         return self._server and self._server.connected
     
 
+    def sprite_images(self, name:str) -> List[bpy.types.Image]:
+        """Get images synced with the sprite of the given name"""
+        index = self._image_index
+        if index is not None and self._image_index_size == len(bpy.data.images):
+            try:
+                cached = index.get(name, ())
+                images = [img for img in cached if img.sb_props.sync_name == name]
+                if images and len(images) == len(cached):
+                    return images
+            except ReferenceError:
+                # image was removed
+                pass
+
+        # missing or stale, look through all images once to find this and next ones
+        index = self._image_index = {}
+        for img in bpy.data.images:
+            index.setdefault(img.sb_props.sync_name, []).append(img)
+        self._image_index_size = len(bpy.data.images)
+        return list(index.get(name, ()))
+
+
+    @property
+    def sheet_images(self) -> List[bpy.types.Image]:
+        """Get images that have a spritesheet, i.e. can be animated"""
+        if self._sheet_images is not None and self._sheet_images_size == len(bpy.data.images):
+            try:
+                # same number of images does not mean it's the same images
+                for img in self._sheet_images:
+                    img.name
+                return self._sheet_images
+            except ReferenceError:
+                pass
+
+        self._sheet_images = [img for img in bpy.data.images if img.sb_props.sheet]
+        self._sheet_images_size = len(bpy.data.images)
+        return self._sheet_images
+
+
+    def invalidate_image_index(self):
+        """Drop cached image lookups, must be called when images might have been renamed or replaced"""
+        self._image_index = None
+        self._sheet_images = None
+
+
+    def sprite_actions(self, image:Union[bpy.types.Image, None]) -> List[bpy.types.Action]:
+        """Get actions created for the sprite"""
+        # only names are stored, references to blender data don't survive undo
+        key = image.name if image else None
+        if self._sprite_actions is not None and self._sprite_actions_size == len(bpy.data.actions) and key in self._sprite_actions:
+            actions = [bpy.data.actions.get(name) for name in self._sprite_actions[key]]
+            if all(a is not None and a.sb_props.sprite == image for a in actions):
+                return actions
+
+        # missing or stale (renamed action or image), rebuild
+        self._sprite_actions = {}
+        for action in bpy.data.actions:
+            sprite = action.sb_props.sprite
+            self._sprite_actions.setdefault(sprite.name if sprite else None, []).append(action.name)
+        self._sprite_actions_size = len(bpy.data.actions)
+        return [bpy.data.actions[name] for name in self._sprite_actions.get(key, ())]
+
+
+    def invalidate_sprite_actions(self):
+        """Drop cached action lookup, must be called when actions might have been added, removed, or reassigned"""
+        self._sprite_actions = None
+
+
     @property
     def active_sprite_image(self) -> Union[bpy.types.Image, None]:
-        return next((img for img in bpy.data.images if img.sb_props.sync_name == self.active_sprite), None)
+        return next(iter(self.sprite_images(self.active_sprite)), None)
 
 
     @property
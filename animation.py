@@ -133,7 +133,7 @@ class SB_PT_animation(bpy.types.Panel):
             # Info
             row = layout.row()
             row.alignment = 'CENTER'
-            if next((False for img in bpy.data.images if img.sb_props.sheet), True):
+            if not addon.sheet_images:
                 row.label(text="No synced sprites have animations", icon='INFO')
             elif not obj.sb_props.animations:
                 row.label(text="Press \"+\" to set up 2D animation", icon='INFO')
@@ -148,7 +148,7 @@ class SB_PT_animation(bpy.types.Panel):
                 anim = obj.sb_props.animations[obj.sb_props.animation_index]
                 prop_name = anim.prop_name
 
-                if not next((True for driver in obj.animation_data.drivers if driver.data_path == f'modifiers["{prop_name}"].offset'), False):
+                if not obj.animation_data.drivers.find(f'modifiers["{prop_name}"].offset'):
                     layout.row().label(text="Driver(s) were removed or renamed", icon='ERROR')
                 elif prop_name not in obj.modifiers:
                     layout.row().label(text="UVWarp modifier was removed or renamed", icon='ERROR')
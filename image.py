@@ -19,7 +19,6 @@
 # SOFTWARE.
 
 import bpy
-import bmesh
 import gpu
 import bgl
 from mathutils import Matrix
@@ -34,7 +33,7 @@ from .layers import find_tree, update_color_outputs
 from .addon import addon
 from.util import image_nodata
 
-from typing import Tuple, Generator
+from typing import Iterable
 
 COLOR_MODES = [
     ('rgba', "RGBA", "32-bit color with transparency. If not sure, pick this one"),
@@ -42,39 +41,84 @@ COLOR_MODES = [
     ('gray', "Grayscale", "Palettized with 256 levels of gray")]
 
 
-def uv_lines(mesh:bpy.types.Mesh, only_selected=True) -> Generator[Tuple[Tuple[float, float], Tuple[float, float]], None, None]:
-    """Iterate over line segments of the UV map. End points are sorted, so overlaps always have same point order."""
+def uv_segments(mesh:bpy.types.Mesh, only_selected=True) -> np.ndarray:
+    """Line segments of the UV map as an array of (u1, v1, u2, v2) rows. End points are sorted, so overlaps always have same point order."""
     # need to make a copy, otherwise uv watch will interrupt the user editing the uv map or mesh itself
     # not needed for oneshot send but if we can do it on timer, migh as well always
     mc = mesh.copy()
-    bm = bmesh.new()
     try:
-        bm.from_mesh(mc)
-    except:
-        bm.free()
-        return
+        uv_layer = mc.uv_layers.active
+        if not uv_layer:
+            return np.empty((0, 4), dtype=np.float32)
 
-    uv = bm.loops.layers.uv.active
+        nloops, npolys = len(mc.loops), len(mc.polygons)
+        uv = np.empty(nloops * 2, dtype=np.float32)
+        uv_layer.data.foreach_get("uv", uv)
+        uv.shape = (nloops, 2)
 
-    # get all edges
-    for face in bm.faces:
-        if only_selected and not face.select:
+        loop_start = np.empty(npolys, dtype=np.int32)
+        loop_total = np.empty(npolys, dtype=np.int32)
+        mc.polygons.foreach_get("loop_start", loop_start)
+        mc.polygons.foreach_get("loop_total", loop_total)
+
+        if only_selected:
             # not shown in the UV editor, skipping
-            continue
+            select = np.empty(npolys, dtype=bool)
+            mc.polygons.foreach_get("select", select)
+            loop_start, loop_total = loop_start[select], loop_total[select]
+    finally:
+        bpy.data.meshes.remove(mc)
 
-        for i in range(0, len(face.loops)):
-            a = face.loops[i - 1][uv].uv.to_tuple()
-            b = face.loops[i][uv].uv.to_tuple()
+    # each loop makes an edge with the previous one in its face, first loop wraps around to the last
+    nth = np.arange(loop_total.sum()) - np.repeat(np.cumsum(loop_total) - loop_total, loop_total)
+    b = np.repeat(loop_start, loop_total) + nth
+    a = np.where(nth == 0, b + np.repeat(loop_total, loop_total), b) - 1
+    lines = np.hstack((uv[a], uv[b]))
 
-            # sorting helps catching overlapping lines for differently directed loops
-            # order doesn't really matter - just that there is one
-            if a > b:
-                yield (b, a)
-            else:
-                yield (a, b)
+    # sorting helps catching overlapping lines for differently directed loops
+    # order doesn't really matter - just that there is one
+    swap = (lines[:, 0] > lines[:, 2]) | ((lines[:, 0] == lines[:, 2]) & (lines[:, 1] > lines[:, 3]))
+    lines[swap] = lines[swap][:, (2, 3, 0, 1)]
+
+    return lines
+
+
+def uv_lines(meshes:Iterable[bpy.types.Mesh], only_selected=True) -> np.ndarray:
+    """Line segments of the meshes' UV maps as (u1, v1, u2, v2) rows, with overlapping lines only included once"""
+    segments = [np.empty((0, 4), dtype=np.float32)]
+    segments += (uv_segments(mesh, only_selected) for mesh in meshes)
+    return np.unique(np.concatenate(segments), axis=0)
+
+
+def sprite_pixels(image:bpy.types.Image, desample:int=1) -> np.ndarray:
+    """Get image pixels as flat RGBA bytes in aseprite row order, taking every `desample`-th pixel of prescaled images"""
+    w, h = image.size
+    pixels = util.get_pixels(image)
+    pixels.shape = (h, w, 4)
 
-    bm.free()
-    bpy.data.meshes.remove(mc)
+    # only convert the pixels that are actually sent
+    pixels = pixels[::-desample,::desample,:] * 255
+    return np.rint(pixels, out=pixels).astype(np.ubyte).ravel()
+
+
+_uv_offscreen_ref = None
+
+def _uv_offscreen(w:int, h:int) -> gpu.types.GPUOffScreen:
+    """Framebuffer to draw the UV map into. With UV watch, the map is redrawn on every change, so keep it while the size stays the same"""
+    global _uv_offscreen_ref
+    if _uv_offscreen_ref is None or (_uv_offscreen_ref.width, _uv_offscreen_ref.height) != (w, h):
+        if _uv_offscreen_ref is not None:
+            _uv_offscreen_ref.free()
+        _uv_offscreen_ref = gpu.types.GPUOffScreen(w, h)
+    return _uv_offscreen_ref
+
+
+def free_uv_offscreen():
+    """Release the UV map framebuffer"""
+    global _uv_offscreen_ref
+    if _uv_offscreen_ref is not None:
+        _uv_offscreen_ref.free()
+        _uv_offscreen_ref = None
 
 
 class SB_OT_uv_send(bpy.types.Operator):
@@ -120,15 +164,15 @@ class SB_OT_uv_send(bpy.types.Operator):
         lines = self.color[0:3] + (1.0,)
         nbuf = np.zeros((h, w, 4), dtype=np.uint8)
 
-        offscreen = gpu.types.GPUOffScreen(w, h)
+        offscreen = _uv_offscreen(w, h)
 
         objects = [obj for obj in context.view_layer.objects if obj.select_get() and obj.type == 'MESH']
         active_obj = context.view_layer.objects.active
         if active_obj and active_obj.type == 'MESH':
             objects.append(active_obj)
 
-        edges = set(line for obj in objects for line in uv_lines(obj.data, only_selected=not context.scene.tool_settings.use_uv_select_sync))
-        coords = [c for pt in edges for c in pt]
+        edges = uv_lines((obj.data for obj in objects), only_selected=not context.scene.tool_settings.use_uv_select_sync)
+        coords = edges.reshape(-1, 2)
         shader = gpu.shader.from_builtin('2D_UNIFORM_COLOR')
         batch = batch_for_shader(shader, 'LINES', {"pos": coords})
 
@@ -400,9 +444,7 @@ class SB_OT_sprite_edit(bpy.types.Operator):
         else:
             pre_w = img.sb_props.prescale_size[0]
             desample = max(img.size[0] // pre_w, 1) if pre_w > 0 else 1
-            pixels = np.asarray(np.array(img.pixels) * 255, dtype=np.ubyte)
-            pixels.shape = (img.size[1], img.size[0], 4)
-            pixels = np.ravel(pixels[::-desample,::desample,:])
+            pixels = sprite_pixels(img, desample)
 
             msg = encode.image(
                 name=img.name,
@@ -430,10 +472,7 @@ class SB_OT_sprite_edit_copy(bpy.types.Operator):
         img = context.edit_image
         pre_w = img.sb_props.prescale_size[0]
         desample = max(img.size[0] // pre_w, 1) if pre_w > 0 else 1
-
-        pixels = np.asarray(np.array(img.pixels) * 255, dtype=np.ubyte)
-        pixels.shape = (img.size[1], img.size[0], 4)
-        pixels = np.ravel(pixels[::-desample,::desample,:])
+        pixels = sprite_pixels(img, desample)
 
         msg = encode.image(
             name="",
@@ -516,9 +555,9 @@ class SB_OT_sprite_purge(bpy.types.Operator):
 
                         # modifier
                         if obj.animation_data:
-                            for driver in obj.animation_data.drivers:
-                                if driver.data_path == f'modifiers["{prop_name}"].offset':
-                                    obj.animation_data.drivers.remove(driver)
+                            mod_datapath = f'modifiers["{prop_name}"].offset'
+                            for driver in [d for d in obj.animation_data.drivers if d.data_path == mod_datapath]:
+                                obj.animation_data.drivers.remove(driver)
 
                         if prop_name in obj.modifiers:
                             obj.modifiers.remove(obj.modifiers[prop_name])
@@ -651,6 +690,7 @@ class SB_OT_sprite_reload_all(bpy.types.Operator):
         return addon.connected
 
     def execute(self, context):
+        util.forget_image_digests() # reloading should rewrite images even if aseprite sends the same data
         addon.server.send(encode.peek([it for it in addon.texture_list if path.exists(it[0])]))
         return {'FINISHED'}
 
@@ -5,7 +5,7 @@ from itertools import chain
 from typing import List, Tuple
 
 from .ase import BlendMode
-from .util import pack_empty_png
+from .util import pack_empty_png, set_pixels, normalize_pixels
 
 
 def create_node_helper():
@@ -345,22 +345,15 @@ def update_images(tree:bpy.types.ShaderNodeTree, sprite_name:str, layers:List[Tu
             if image.size != (w, h):
                 image.scale(w, h)
             
-            pixels = np.float32(pixels) / 255.0
-            # flip y axis ass backwards
-            pixels.shape = (h, pixels.size // h)
-            pixels = pixels[::-1,:].ravel()
-
-            # change blender data
-            try:
-                # version >= 2.83; this is much faster
-                image.pixels.foreach_set(pixels)
-            except AttributeError:
-                # version < 2.83
-                image.pixels[:] = pixels
+            # flip y axis ass backwards, in the same pass as the conversion
+            pixels = np.frombuffer(pixels, dtype=np.ubyte).reshape(h, w, 4)[::-1]
+            pixels = normalize_pixels(pixels).ravel()
+
+            set_pixels(image, pixels)
         else:
             if not image_created:
                 image.scale(1, 1)
-                image.pixels.foreach_set([0.0, 0.0, 0.0, 0.0])
+                set_pixels(image, (0.0, 0.0, 0.0, 0.0))
 
         image.update()
         image.update_tag()
@@ -18,6 +18,7 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import struct
 from typing import Set, Type
 from types import SimpleNamespace as MessageArgs
 
@@ -25,6 +26,10 @@ from types import SimpleNamespace as MessageArgs
 ID_SIZE = 1
 DATA_LEN_SIZE = 4 # 4GB more than enough
 
+# precompiled formats for reading integers of common sizes without slicing the message
+_UINT_FORMATS = {size: struct.Struct(f"<{c}") for size, c in ((1, 'B'), (2, 'H'), (4, 'I'), (8, 'Q'))}
+_SINT_FORMATS = {size: struct.Struct(f"<{c}") for size, c in ((1, 'b'), (2, 'h'), (4, 'i'), (8, 'q'))}
+
 
 class Handler:
     """A handler for a type of incoming messages. Implementation should override parse and execute methods"""
@@ -53,6 +58,8 @@ class Handler:
     def take_uint(self, size:int) -> int:
         """Parse an unsigned integer"""
         self._position += size
+        if size in _UINT_FORMATS:
+            return _UINT_FORMATS[size].unpack_from(self._data, self._position - size)[0]
         return int.from_bytes(
             bytes=self._data[self._position - size:self._position],
             byteorder='little',
@@ -62,6 +69,8 @@ class Handler:
     def take_sint(self, size:int) -> int:
         """Parse a signed integer"""
         self._position += size
+        if size in _SINT_FORMATS:
+            return _SINT_FORMATS[size].unpack_from(self._data, self._position - size)[0]
         return int.from_bytes(
             bytes=self._data[self._position - size:self._position],
             byteorder='little',
@@ -27,6 +27,7 @@ from . import Handler
 import numpy as np
 # TODO move into local methods
 from .. import modify
+from .. import util
 from ..addon import addon
 from .. import ase
 
@@ -57,14 +58,46 @@ class Image(Handler):
 
     async def execute(self, *, size:Tuple[int, int], frame:int, flags:Set[str], name:str, data:np.array):
         try:
-            # TODO separate cases for named and anonymous sprites
-            if not bpy.context.window_manager.is_interface_locked:
-                modify.image(size[0], size[1], name, frame, flags, data)
-            else:
-                bpy.ops.pribambase.report(message_type='WARNING', message="UI is locked, image update skipped")
+            locked = bpy.context.window_manager.is_interface_locked
         except AttributeError:
             # blender 2.80... if it crashes, it crashes :\
-            modify.image(size[0], size[1], name, frame, flags, data)
+            locked = False
+
+        if locked:
+            bpy.ops.pribambase.report(message_type='WARNING', message="UI is locked, image update skipped")
+            return
+
+        digest = util.pixels_digest(data)
+        # flip y axis ass backwards, in the same pass as the conversion
+        pixels = util.normalize_pixels(data.reshape(size[1], size[0], 4)[::-1])
+        # TODO separate cases for named and anonymous sprites
+        modify.image(size[0], size[1], name, frame, flags, pixels, digest)
+
+
+# sheets are large and get rebuilt on every change in aseprite, reuse the memory instead of allocating it each time
+_scratch_buffers = {}
+_SCRATCH_BUFFERS_MAX_BYTES = 64 * 1024 * 1024
+
+def _scratch_buffer(shape:Tuple[int, ...]) -> np.ndarray:
+    """Get uninitialized byte array of the given shape. The contents are only valid until the next call with the same shape"""
+    buf = _scratch_buffers.get(shape)
+    if buf is None:
+        buf = np.empty(shape, dtype=np.ubyte)
+        if buf.nbytes > _SCRATCH_BUFFERS_MAX_BYTES:
+            # too large to keep around
+            return buf
+
+        total = sum(b.nbytes for b in _scratch_buffers.values())
+        while _scratch_buffers and total + buf.nbytes > _SCRATCH_BUFFERS_MAX_BYTES:
+            # forget the oldest one, likely a sprite that's no longer edited
+            total -= _scratch_buffers.pop(next(iter(_scratch_buffers))).nbytes
+        _scratch_buffers[shape] = buf
+    return buf
+
+
+def clear_scratch_buffers():
+    """Release memory kept for spritesheet updates"""
+    _scratch_buffers.clear()
 
 
 class Spritesheet(Handler):
@@ -98,17 +131,17 @@ class Spritesheet(Handler):
         w, h = size
         stride = (w + 2) * 4
 
-        # TODO profile if changing to .empty gives significant perf (at cost of messy look)
         # copying with 1px padding on each side (so there's 1px space on the edge, 2px between tiles)
-        sheet_data = np.zeros(((h + 2) * count_y, stride * count_x), dtype=np.ubyte)
+        # every byte of the sheet gets written below, so it doesn't need clearing
+        sheet_data = _scratch_buffer(((h + 2) * count_y, stride * count_x))
 
-        for n,frame in enumerate(images):
-            # TODO is there a way to just swap the nparray's buffer? 
-            x, y = n % count_x, n // count_x
-            fd = np.frombuffer(frame, dtype=np.ubyte)
-            fd.shape = (h, w * 4)
-            dst = sheet_data[y * (h + 2) + 1: (y + 1) * (h + 2) - 1, x * stride + 4: (x + 1) * stride - 4]
-            np.copyto(dst, fd, casting='no')
+        # copy each frame straight into its tile through a (row, y, column, x) view of the sheet
+        grid = sheet_data.reshape(count_y, h + 2, count_x, stride)
+        for i, frame in enumerate(images):
+            np.copyto(grid[i // count_x, 1:-1, i % count_x, 4:-4], np.frombuffer(frame, dtype=np.ubyte).reshape(h, w * 4), casting='no')
+        for i in range(length, count_x * count_y):
+            # empty tiles at the end stay blank
+            grid[i // count_x, 1:-1, i % count_x, 4:-4] = 0
 
         sheet_data.shape = (count_x * count_y * (h + 2), stride) # turn sheet into a single column
         np.copyto(sheet_data[:, :4],sheet_data[:, 4:8], casting='no') # left
@@ -121,14 +154,19 @@ class Spritesheet(Handler):
 
         sheet_data.shape = ((h + 2) * count_y, stride * count_x) # turn sheet back
 
+        # convert and flip once for the whole sheet, the current frame image is cut from it later
+        sheet_digest = util.pixels_digest(sheet_data)
+        frame_digest = util.pixels_digest(images[current_frame]) if current_frame < length else None
+        sheet_pixels = util.normalize_pixels(sheet_data[::-1])
+
         try:
             if not bpy.context.window_manager.is_interface_locked:
-                modify.spritesheet(size, (count_x, count_y), name, start, frames, tags, current_frame, current_tag, sheet_data)
+                modify.spritesheet(size, (count_x, count_y), name, start, frames, tags, current_frame, current_tag, sheet_pixels, sheet_digest, frame_digest)
             else:
                 bpy.ops.pribambase.report(message_type='WARNING', message="UI is locked, image update skipped")
         except AttributeError:
             # version 2.80... caveat emptor
-            modify.spritesheet(size, (count_x, count_y), name, start, frames, tags, current_frame, current_tag, sheet_data)
+            modify.spritesheet(size, (count_x, count_y), name, start, frames, tags, current_frame, current_tag, sheet_pixels, sheet_digest, frame_digest)
 
 
 class Frame(Handler):
@@ -24,13 +24,19 @@ Operators used internally to modify blender data during sync.
 
 import bpy
 import numpy as np
-from typing import Collection, Tuple
+from typing import Collection, Set, Tuple
 from . import util
 from .util import ModalExecuteMixin, image_nodata
 from .addon import addon
 from .layers import update_layers
 
 
+def _upscale(px:np.ndarray, scale:int) -> np.ndarray:
+    """Nearest neighbor upscale of (h, w, channels) pixels, written in a single pass"""
+    h, w, c = px.shape
+    return np.broadcast_to(px[:, None, :, None, :], (h, scale, w, scale, c)).reshape(h * scale, w * scale, c)
+
+
 def prescale(image:bpy.types.Image):
     """Scale image in-place without filtering"""
 
@@ -49,20 +55,14 @@ def prescale(image:bpy.types.Image):
         # already scaled as we want it to
         return
 
-    px = np.array(image.pixels, dtype=np.float32)
-    px.shape = (h, w, 4)
+    px = util.get_pixels(image).reshape(h, w, 4)
     
     if desample > 1:
         px = px[::desample,::desample,:]
-    px = px.repeat(scale, 1).repeat(scale, 0)
+    px = _upscale(px, scale)
 
     image.scale((w // desample) * scale, (h // desample) * scale)
-    try:
-        # version >= 2.83
-        image.pixels.foreach_set(px.ravel())
-    except AttributeError:
-        # version < 2.83
-        image.pixels[:] = px.ravel()
+    util.set_pixels(image, px.ravel())
     image.update()
     image.update_tag()
 
@@ -71,93 +71,94 @@ def prescale(image:bpy.types.Image):
         bpy.ops.image.reload({"edit_image": image})
 
 
-_update_image_args = None
-def image(w, h, name, frame, flags, pixels):
-    # NOTE this operator removes animation flag from image
-    global _update_image_args
-    _update_image_args = w, h, name, frame, flags, pixels
-    bpy.ops.pribambase.update_image()
+def _update_image(img:bpy.types.Image, w:int, h:int, frame:int, flags:Set[str], pixels:np.ndarray, digest:bytes=None):
+    """Replace the image with pixel data, without refreshing the UI. Pass digest of the source data to skip writing the same pixels again"""
+    pixels = pixels.reshape(h, w, 4) # also catches size mismatch before anything is changed
+    prescale = img.sb_props.prescale
 
-class SB_OT_update_image(bpy.types.Operator, ModalExecuteMixin):
-    bl_idname = "pribambase.update_image"
-    bl_label = "Update Image"
-    bl_description = ""
-    bl_options = {'UNDO_GROUPED', 'INTERNAL'}
-    bl_undo_group = "pribambase.update_image"
+    # aseprite often resends the same image, e.g. when switching sprites or reconnecting
+    unchanged = digest is not None and util.image_digest(img) == digest and img.size == (w * prescale, h * prescale) and not image_nodata(img)
 
-    def modal_execute(self, context):
-        """Replace the image with pixel data"""
-        img = None
-        w, h, name, frame, flags, pixels = self.args
+    if image_nodata(img):
+        # load *some* data so that the image can be updated
+        util.pack_empty_png(img)
 
-        # convert data to blender accepted floats
-        pixels = np.float32(pixels) / 255.0
-        # flip y axis ass backwards
-        pixels.shape = (h, pixels.size // h)
-        pixels = pixels[::-1,:].ravel()
+    if img.size != (w * prescale, h * prescale):
+        img.scale(w * prescale, h * prescale)
 
-        for img in bpy.data.images:
-            if name == img.sb_props.sync_name:
-                prescale = img.sb_props.prescale
+    if frame != -1:
+        img.sb_props.frame = frame
 
-                if image_nodata(img):
-                    # load *some* data so that the image can be updated
-                    util.pack_empty_png(img)
+    resend_uv = ('SHOW_UV' not in img.sb_props.sync_flags and 'SHOW_UV' in flags) and addon.watch
 
-                if img.size != (w * prescale, h * prescale):
-                    img.scale(w * prescale, h * prescale)
+    img.sb_props.sync_flags = flags
 
-                if frame != -1:
-                    img.sb_props.frame = frame
+    if resend_uv:
+        addon.watch.resend() # call after changing the flags
 
-                resend_uv = ('SHOW_UV' not in img.sb_props.sync_flags and 'SHOW_UV' in flags) and addon.watch
-                    
-                img.sb_props.sync_flags = flags
+    if unchanged:
+        img.update_tag()
+        return
+
+    if prescale > 1:
+        pixels = _upscale(pixels, prescale)
 
-                if resend_uv:
-                    addon.watch.resend() # call after changing the flags
+    # change blender data
+    util.set_pixels(img, np.ravel(pixels), digest)
 
-                img_pixels = pixels
-                if prescale > 1:
-                    img_pixels.shape = (h, w, 4)
-                    img_pixels = img_pixels.repeat(prescale, 1).repeat(prescale, 0)
-                    img_pixels = img_pixels.ravel()
+    img.update()
+    # [#12] for some users viewports do not update from update() alone
+    img.update_tag()
+
+    if addon.prefs.save_after_sync:
+        bpy.ops.image.save({"edit_image": img})
+        bpy.ops.image.reload({"edit_image": img})
 
-                # change blender data
-                try:
-                    # version >= 2.83; this is much faster
-                    img.pixels.foreach_set(img_pixels)
-                except AttributeError:
-                    # version < 2.83
-                    img.pixels[:] = img_pixels
 
-                img.update()
-                # [#12] for some users viewports do not update from update() alone
-                img.update_tag()
+# areas where synced images show up, others don't need redrawing after an update
+_SPRITE_SPACES = ('VIEW_3D', 'IMAGE_EDITOR')
+_SPRITE_LAYERS_SPACES = ('VIEW_3D', 'IMAGE_EDITOR', 'NODE_EDITOR')
+# spritesheet updates also change keyframes and action ranges, and foreach_set doesn't notify animation editors
+_SPRITESHEET_SPACES = ('VIEW_3D', 'IMAGE_EDITOR', 'DOPESHEET_EDITOR', 'GRAPH_EDITOR', 'NLA_EDITOR')
 
-                if addon.prefs.save_after_sync:
-                    bpy.ops.image.save({"edit_image": img})
-                    bpy.ops.image.reload({"edit_image": img})
 
-        util.refresh()
+def image(w, h, name, frame, flags, pixels, digest=None):
+    # NOTE this operator removes animation flag from image
+    # NOTE pixels are expected to be already converted to floats, with rows going bottom to top
+    SB_OT_update_image._pending = w, h, name, frame, flags, pixels, digest
+    bpy.ops.pribambase.update_image()
+
+class SB_OT_update_image(bpy.types.Operator, ModalExecuteMixin):
+    bl_idname = "pribambase.update_image"
+    bl_label = "Update Image"
+    bl_description = ""
+    bl_options = {'UNDO_GROUPED', 'INTERNAL'}
+    bl_undo_group = "pribambase.update_image"
+    _pending = None # arguments for the next run, passed around the operator call
+
+    def modal_execute(self, context):
+        """Replace the image with pixel data"""
+        w, h, name, frame, flags, pixels, digest = self.args
+
+        for img in addon.sprite_images(name):
+            _update_image(img, w, h, frame, flags, pixels, digest)
+
+        util.refresh(_SPRITE_SPACES)
 
         self.args = None
-        global _update_image_args
-        _update_image_args = None
 
         return {'FINISHED'}
 
 
     def execute(self, context):
-        self.args = _update_image_args
+        self.args = SB_OT_update_image._pending
+        SB_OT_update_image._pending = None
         return ModalExecuteMixin.execute(self, context)
 
 
-_update_layers_args = None
 def image_layers(width, height, name, flags, groups, layers):
     # NOTE this operator removes animation flag from image
-    global _update_layers_args
-    _update_layers_args = width, height, name, flags, groups, layers
+    SB_OT_update_image_layers._pending = width, height, name, flags, groups, layers
     bpy.ops.pribambase.update_image_layers()
 
 class SB_OT_update_image_layers(bpy.types.Operator, ModalExecuteMixin):
@@ -166,6 +167,7 @@ class SB_OT_update_image_layers(bpy.types.Operator, ModalExecuteMixin):
     bl_description = ""
     bl_options = {'UNDO_GROUPED', 'INTERNAL'}
     bl_undo_group = "pribambase.update_image_layers"
+    _pending = None # arguments for the next run, passed around the operator call
 
     def modal_execute(self, context):
         """Replace the image with pixel data"""
@@ -182,20 +184,63 @@ class SB_OT_update_image_layers(bpy.types.Operator, ModalExecuteMixin):
         tree.sb_props.size = (width, height)
         
         update_layers(tree, name, width, height, groups, layers)
-        util.refresh()
+        util.refresh(_SPRITE_LAYERS_SPACES)
 
         self.args = None
-        global _update_layers_args
-        _update_layers_args = None
 
         return {'FINISHED'}
 
 
     def execute(self, context):
-        self.args = _update_layers_args
+        self.args = SB_OT_update_image_layers._pending
+        SB_OT_update_image_layers._pending = None
         return ModalExecuteMixin.execute(self, context)
 
 
+# enum value for keyframe_points.foreach_set
+_INTERPOLATION_CONSTANT = bpy.types.Keyframe.bl_rna.properties["interpolation"].enum_items["CONSTANT"].value
+
+
+def _set_keyframes(points:bpy.types.FCurveKeyframePoints, co:np.ndarray) -> bool:
+    """Make the curve consist of unselected constant keyframes at (x, y) rows of co. Returns False if the points already are at those positions"""
+    co = co.astype(np.float32).ravel()
+    nframes = len(co) // 2
+    npoints = len(points)
+
+    if npoints == nframes:
+        current = np.empty(npoints * 2, dtype=np.float32)
+        points.foreach_get("co", current)
+        if np.array_equal(current, co):
+            return False
+    elif npoints < nframes:
+        points.add(nframes - npoints)
+    else:
+        try:
+            # all points get overwritten anyway, so it's fine to drop all of them at once
+            points.clear()
+            points.add(nframes)
+        except AttributeError:
+            # older versions can only remove one at a time
+            for _ in range(npoints - nframes):
+                points.remove(points[0], fast=True)
+
+    points.foreach_set("co", co)
+    points.foreach_set("interpolation", np.full(nframes, _INTERPOLATION_CONSTANT, dtype=np.int32))
+    unselected = np.zeros(nframes, dtype=bool)
+    for prop in ("select_control_point", "select_left_handle", "select_right_handle"):
+        points.foreach_set(prop, unselected)
+    return True
+
+
+def _frame_keyframes(frames:Collection[Tuple[int, int]], first:float, start:int, fps:float) -> np.ndarray:
+    """Get (x, y) keyframe rows for (frame, duration) pairs, each keyframe placed at the frame's start time"""
+    cels, durations = np.asarray(frames).T
+    x = first + (np.cumsum(durations) - durations) * fps / 1000
+    if addon.prefs.whole_frames:
+        x = np.round(x)
+    return np.column_stack((x, start + cels))
+
+
 def sheet_animation(anim):
     obj = anim.id_data
     prop_name = anim.prop_name
@@ -227,23 +272,26 @@ def sheet_animation(anim):
         if obj.animation_data is None:
             obj.animation_data_create()
         else:
-            for driver in obj.animation_data.drivers:
-                if driver.data_path == f'modifiers["{prop_name}"].offset':
-                    obj.animation_data.drivers.remove(driver)
-
-        dx, dy = curves = uvwarp.driver_add("offset")
-        for curve in curves:
+            mod_datapath = f'modifiers["{prop_name}"].offset'
+            for driver in [d for d in obj.animation_data.drivers if d.data_path == mod_datapath]:
+                obj.animation_data.drivers.remove(driver)
+
+        # keyframes for every frame, computed for both curves at once
+        i = np.arange(nframes)
+        frames = start + i - 0.5
+        offsets = ((i % w) * (1 + 2 / iw) + 1 / iw, -(i // w) * (1 + 2 / ih) - 1 / ih)
+
+        prop_path = f'["{prop_name}"]'
+        curves = uvwarp.driver_add("offset")
+        for curve, offset in zip(curves, offsets):
             # there's a polynomial modifier by default
             curve.modifiers.remove(curve.modifiers[0])
 
             # curve shape
-            curve.keyframe_points.add(nframes)
-            for i,p in enumerate(curve.keyframe_points):
-                if curve == dx:
-                    p.co = (start + i - 0.5, (i % w) * (1 + 2 / iw) + 1 / iw)
-                else:
-                    p.co = (start + i - 0.5, -(i // w) * (1 + 2 / ih) - 1 / ih)
-                p.interpolation = 'CONSTANT'
+            points = curve.keyframe_points
+            points.add(nframes)
+            points.foreach_set("co", np.column_stack((frames, offset)).astype(np.float32).ravel())
+            points.foreach_set("interpolation", np.full(nframes, _INTERPOLATION_CONSTANT, dtype=np.int32))
 
             # add variable
             driver = curve.driver
@@ -253,7 +301,7 @@ def sheet_animation(anim):
             tgt = fv.targets[0]
             tgt.id_type = 'OBJECT'
             tgt.id = obj
-            tgt.data_path = f'["{prop_name}"]'
+            tgt.data_path = prop_path
 
             curve.update()
 
@@ -275,11 +323,10 @@ def _update_action_range(scene):
             addon.state.action_preview_enabled = False
 
 
-_update_spritesheet_args = None
-def spritesheet(size, count, name, start, frames, tags, current_frame, current_tag, pixels):
+def spritesheet(size, count, name, start, frames, tags, current_frame, current_tag, pixels, sheet_digest=None, frame_digest=None):
     # NOTE this function sets animation flag
-    global _update_spritesheet_args
-    _update_spritesheet_args = size, count, name, start, frames, tags, current_frame, current_tag, pixels
+    # NOTE pixels are expected to be already converted to floats, with rows going bottom to top
+    SB_OT_update_spritesheet._pending = size, count, name, start, frames, tags, current_frame, current_tag, pixels, sheet_digest, frame_digest
     bpy.ops.pribambase.update_spritesheet()
 
 class SB_OT_update_spritesheet(bpy.types.Operator, ModalExecuteMixin):
@@ -288,10 +335,12 @@ class SB_OT_update_spritesheet(bpy.types.Operator, ModalExecuteMixin):
     bl_description = ""
     bl_options = {'UNDO_GROUPED', 'INTERNAL'}
     bl_undo_group = "pribambase.update_spritesheet"
+    _pending = None # arguments for the next run, passed around the operator call
 
 
-    def update_actions(self, context, img:bpy.types.Image, start:int, frames:Collection[int], current_frame:int, tags:Collection[Tuple[str, int, int, int]], current_tag:str):
+    def update_actions(self, context, img:bpy.types.Image, start:int, frames:Collection[Tuple[int, int]], current_frame:int, tags:Collection[Tuple[str, int, int, int]], current_tag:str):
         fps = context.scene.render.fps / context.scene.render.fps_base
+        frames = np.array(frames) # (frame, duration) rows
 
         # loop tag is the current playing part of the timeline in aseprite
         tag_editor = ("__loop__",)
@@ -331,9 +380,10 @@ class SB_OT_update_spritesheet(bpy.types.Operator, ModalExecuteMixin):
             if ani_dir == 1:
                 tag_frames = tag_frames[::-1]
             elif ani_dir == 2:
-                tag_frames = tag_frames + tag_frames[-2:0:-1] # sigh
+                tag_frames = np.concatenate((tag_frames, tag_frames[-2:0:-1])) # sigh
 
-            tag_frames.append(tag_frames[-1]) # one more keyframe to keep the last frame duration inside in the action
+            tag_frames = np.concatenate((tag_frames, tag_frames[-1:])) # one more keyframe to keep the last frame duration inside in the action
+            co = _frame_keyframes(tag_frames, first, start, fps)
 
             if not action.fcurves:
                 fcurve = action.fcurves.new(f'["Frame {img.name}"]')
@@ -346,90 +396,71 @@ class SB_OT_update_spritesheet(bpy.types.Operator, ModalExecuteMixin):
                     #    so we can't be certain that the name is same as default and update all of them
                     continue
 
-                points = fcurve.keyframe_points
-                npoints = len(points)
-                nframes = len(tag_frames)
-                if npoints < nframes:
-                    points.add(nframes - npoints)
-                elif npoints > nframes:
-                    for _ in range(npoints - nframes):
-                        points.remove(points[0], fast=True)
-
-                time = 0
-                for point,(y, dt) in zip(points, tag_frames):
-                    x = first + time * fps / 1000
-                    if addon.prefs.whole_frames:
-                        x = round(x)
-                    point.co = (x, start + y)
-                    point.select_control_point = point.select_left_handle = point.select_right_handle = False
-                    point.interpolation = 'CONSTANT'
-                    time += dt
-
-                fcurve.update()
+                if _set_keyframes(fcurve.keyframe_points, co):
+                    fcurve.update()
             action.update_tag()
 
+        addon.invalidate_sprite_actions() # tags might've been renamed, which removes and adds same number of actions
         _update_action_range(context.scene)
 
 
     def modal_execute(self, context):
-        size, count, name, start, frames, tags, current_frame, current_tag, pixels = self.args
+        size, count, name, start, frames, tags, current_frame, current_tag, pixels, sheet_digest, frame_digest = self.args
         tex_w, tex_h = (size[0] + 2) * count[0], (size[1] + 2) * count[1]
+        tiles = pixels.reshape(count[1], size[1] + 2, count[0], (size[0] + 2) * 4) # (row, y, column, x) view of the sheet
 
         # find or prepare sheet image; pixels update will fix its size
-        for img in bpy.data.images:
-            if name == img.sb_props.sync_name:
-                try:
-                    sheet = img.sb_props.sheet
-                    tex_name = sheet.name
-                except AttributeError:
-                    tex_name = img.name + " *Sheet*"
-                    with util.pause_depsgraph_updates():
-                        if tex_name not in bpy.data.images:
-                            tex = bpy.data.images.new(tex_name, tex_w, tex_h, alpha=True)
-                            util.pack_empty_png(tex)
-                    sheet = img.sb_props.sheet = bpy.data.images[tex_name]
-
-                sheet.sb_props.is_sheet = True
-                sheet.sb_props.origin = img
-                sheet.sb_props.animation_length = len(frames)
-                sheet.sb_props.sheet_size = count
-                sheet.sb_props.sheet_start = start
-
-                self.update_actions(context, img, start, frames, current_frame, tags, current_tag)
-
-                self.args = tex_w, tex_h, tex_name, -1, set(), pixels
-                SB_OT_update_image.modal_execute(self, context) # clears self.args
-
-                # cut out the current frame and copy to view image
-                flags = set((*img.sb_props.sync_flags, 'SHEET'))
-                frame_x = current_frame % count[0]
-                frame_y = current_frame // count[0]
-                frame_pixels = np.ravel(pixels[frame_y * (size[1] + 2) + 1 : (frame_y + 1) * (size[1] + 2) - 1, frame_x * (size[0] + 2) * 4 + 4 : (frame_x + 1) * (size[0] + 2) * 4 - 4])
-                self.args = *size, name, current_frame, flags, frame_pixels
-                SB_OT_update_image.modal_execute(self, context) # clears self.args and animation flag
-
-                # update rig
-                for obj in bpy.data.objects:
-                    for anim in obj.sb_props.animations:
-                        if anim.image == img:
-                            sheet_animation(anim)
-
-                    obj.update_tag
-
-        # clean up
-        global _update_spritesheet_args
-        _update_spritesheet_args = None
+        for img in addon.sprite_images(name):
+            try:
+                sheet = img.sb_props.sheet
+                tex_name = sheet.name
+            except AttributeError:
+                tex_name = img.name + " *Sheet*"
+                with util.pause_depsgraph_updates():
+                    if tex_name not in bpy.data.images:
+                        tex = bpy.data.images.new(tex_name, tex_w, tex_h, alpha=True)
+                        util.pack_empty_png(tex)
+                sheet = img.sb_props.sheet = bpy.data.images[tex_name]
+                addon.invalidate_image_index() # the image has animation now
+
+            sheet.sb_props.is_sheet = True
+            sheet.sb_props.origin = img
+            sheet.sb_props.animation_length = len(frames)
+            sheet.sb_props.sheet_size = count
+            sheet.sb_props.sheet_start = start
+
+            self.update_actions(context, img, start, frames, current_frame, tags, current_tag)
+
+            _update_image(sheet, tex_w, tex_h, -1, set(), pixels, sheet_digest)
+
+            # cut out the current frame and copy to view image
+            flags = set((*img.sb_props.sync_flags, 'SHEET'))
+            frame_x = current_frame % count[0]
+            frame_y = count[1] - 1 - current_frame // count[0] # rows are flipped already
+            frame_pixels = np.ascontiguousarray(tiles[frame_y, 1:-1, frame_x, 4:-4]) # without the padding
+            _update_image(img, *size, current_frame, flags, frame_pixels, frame_digest) # clears animation flag
+
+            # update rig
+            for obj in bpy.data.objects:
+                for anim in obj.sb_props.animations:
+                    if anim.image == img:
+                        sheet_animation(anim)
+
+                obj.update_tag
+
+        util.refresh(_SPRITESHEET_SPACES)
+
+        self.args = None
 
     def execute(self, context):
-        self.args = _update_spritesheet_args
+        self.args = SB_OT_update_spritesheet._pending
+        SB_OT_update_spritesheet._pending = None
         return ModalExecuteMixin.execute(self, context)
 
 
-_update_frame_args = None
 def frame(name, frame, start, frames):
     # NOTE this operator removes animation flag from image
-    global _update_frame_args
-    _update_frame_args = name, frame, start, frames
+    SB_OT_update_frame._pending = name, frame, start, frames
     bpy.ops.pribambase.update_frame()
 
 class SB_OT_update_frame(bpy.types.Operator, ModalExecuteMixin):
@@ -438,14 +469,15 @@ class SB_OT_update_frame(bpy.types.Operator, ModalExecuteMixin):
     bl_description = ""
     bl_options = {'UNDO_GROUPED', 'INTERNAL'}
     bl_undo_group = "pribambase.update_frame"
+    _pending = None # arguments for the next run, passed around the operator call
 
     def modal_execute(self, context):
         """Copy the frame from spritesheet to the image"""
         name, frame, start, frames = self.args
 
         try:
-            img = next(i for i in bpy.data.images if name == i.sb_props.sync_name)
-        except StopIteration:
+            img = addon.sprite_images(name)[0]
+        except IndexError:
             # to avoid accidentally reviving deleted images, we ignore anything doesn't exist already
             return
 
@@ -458,48 +490,38 @@ class SB_OT_update_frame(bpy.types.Operator, ModalExecuteMixin):
                     if not fcurve.data_path.startswith('["'):
                         continue
 
-                    for point in fcurve.keyframe_points:
-                        point.co = (point.co.x, frame)
+                    points = fcurve.keyframe_points
+                    co = np.empty(len(points) * 2, dtype=np.float32)
+                    points.foreach_get("co", co)
+                    if np.all(co[1::2] == frame):
+                        continue
+                    co[1::2] = frame
+                    points.foreach_set("co", co)
                     fcurve.update()
 
             elif action.sb_props.sprite == img and action.sb_props.tag == "__loop__":
                 fps = context.scene.render.fps / context.scene.render.fps_base
                 frames.append(frames[-1])
 
+                co = _frame_keyframes(frames, start, start, fps)
+
                 for fcurve in action.fcurves:
                     if not fcurve.data_path.startswith('["'):
                         continue
 
-                    points = fcurve.keyframe_points
-                    npoints = len(points)
-                    nframes = len(frames)
-                    if npoints < nframes:
-                        points.add(nframes - npoints)
-                    elif npoints > nframes:
-                        for _ in range(npoints - nframes):
-                            points.remove(points[0], fast=True)
-
-                    time = 0
-                    for point,(y, dt) in zip(points, frames):
-                        x = start + time * fps / 1000
-                        if addon.prefs.whole_frames:
-                            x = round(x)
-                        point.co = (x, start + y)
-                        point.select_control_point = point.select_left_handle = point.select_right_handle = False
-                        point.interpolation = 'CONSTANT'
-                        time += dt
+                    # flipping frames mostly comes with the same timeline, then there's nothing to rewrite
+                    _set_keyframes(fcurve.keyframe_points, co)
 
         _update_action_range(context.scene)
 
         self.args = None
-        global _update_frame_args
-        _update_frame_args = None
 
         return {'FINISHED'}
 
 
     def execute(self, context):
-        self.args = _update_frame_args
+        self.args = SB_OT_update_frame._pending
+        SB_OT_update_frame._pending = None
         return ModalExecuteMixin.execute(self, context)
 
 
@@ -52,8 +52,8 @@ _anim_sprite_enum_items_ref = None
 def _get_anim_sprite_enum_items(self, context):
     # enum items reference must be stored to avoid crashing the UI
     global _anim_sprite_enum_items_ref
-    _sprite_enum_items_ref = [(img.name, img.name, "") for img in bpy.data.images if img.sb_props.sheet] if context else []
-    return _sprite_enum_items_ref
+    _anim_sprite_enum_items_ref = [(img.name, img.name, "") for img in addon.sheet_images] if context else []
+    return _anim_sprite_enum_items_ref
 
 
 # Pretty annoying but Add SPrite operator should incorporate material creation/assignment, so goo portion of material setup will live outside the operator
@@ -487,7 +487,7 @@ class SB_OT_spritesheet_rig(bpy.types.Operator):
     @classmethod
     def poll(self, context):
         # need a mesh to store modifiers these days
-        return context.active_object and context.active_object.type == 'MESH' and context.active_object.select_get() and next((img for img in bpy.data.images if img.sb_props.sheet), False)  
+        return context.active_object and context.active_object.type == 'MESH' and context.active_object.select_get() and bool(addon.sheet_images)
 
 
     def execute(self, context):
@@ -540,12 +540,12 @@ class SB_OT_spritesheet_rig(bpy.types.Operator):
 
         # revive the curves if needed
         if obj.animation_data and obj.animation_data.action:
-            for fcurve in obj.animation_data.action.fcurves:
-                if fcurve.data_path == prop_path:
-                    # It seems there's no way to clear FCURVE_DISABLED flag directly from script
-                    # Seems that changing the path does that as a side effect
-                    fcurve.data_path += ""
-                    fcurve.update()
+            fcurve = obj.animation_data.action.fcurves.find(prop_path)
+            if fcurve:
+                # It seems there's no way to clear FCURVE_DISABLED flag directly from script
+                # Seems that changing the path does that as a side effect
+                fcurve.data_path += ""
+                fcurve.update()
 
         obj.animation_data.drivers.update()
         obj.update_tag()
@@ -570,7 +570,7 @@ class SB_OT_spritesheet_rig(bpy.types.Operator):
 
 
     def invoke(self, context, event):
-        if not next((True for img in bpy.data.images if img.sb_props.sheet), False):
+        if not addon.sheet_images:
             self.report({'ERROR'}, "No animations in the current blendfile")
             return {'CANCELLED'}
 
@@ -601,9 +601,9 @@ class SB_OT_spritesheet_unrig(bpy.types.Operator):
         prop_name = anim.prop_name
 
         # drivers
-        for driver in obj.animation_data.drivers:
-            if driver.data_path == f'modifiers["{prop_name}"].offset':
-                obj.animation_data.drivers.remove(driver)
+        mod_datapath = f'modifiers["{prop_name}"].offset'
+        for driver in [d for d in obj.animation_data.drivers if d.data_path == mod_datapath]:
+            obj.animation_data.drivers.remove(driver)
 
         # custom property
         try:
@@ -25,6 +25,7 @@ Addon-related data structures and type properties
 import bpy
 import secrets
 import os.path
+from functools import lru_cache
 
 from .addon import addon
 from . import util
@@ -122,7 +123,7 @@ class SB_SheetAnimation(bpy.types.PropertyGroup):
             mod_datapath = f'modifiers["{prop_name}"].offset'
             
             # two driver curves
-            assert len([True for driver in obj.animation_data.drivers if driver.data_path == mod_datapath]) >= 2
+            assert obj.animation_data.drivers.find(mod_datapath, index=0) and obj.animation_data.drivers.find(mod_datapath, index=1)
 
             # custom property
             assert prop_name in obj
@@ -153,15 +154,15 @@ def _enum_tag_actions(self, context):
     # tag actions
     idx = 0
     actions = [("__none__", "", "", 'BLANK1', idx)] # empty list item
-    for a in bpy.data.actions:
+    for a in addon.sprite_actions(anim_sprite):
         idx += 1
-        if a.sb_props.sprite == anim_sprite:
-            if a.sb_props.tag == "__loop__":
-                actions.append((a.name, "*Loop*", "Playback section in Aseprite", 'SEQUENCE', idx))
-            elif a.sb_props.tag == "__view__":
-                actions.append((a.name, "*View*", "Current frame in aseprite, behaves the same as non-animated mode", 'HIDE_OFF', idx))
-            elif a.sb_props.tag:
-                actions.append((a.name, a.sb_props.tag, "Tag Action", 'KEYFRAME', idx))
+        if a.sb_props.tag == "__loop__":
+            actions.append((a.name, "*Loop*", "Playback section in Aseprite", 'SEQUENCE', idx))
+        elif a.sb_props.tag == "__view__":
+            actions.append((a.name, "*View*", "Current frame in aseprite, behaves the same as non-animated mode", 'HIDE_OFF', idx))
+        elif a.sb_props.tag:
+            actions.append((a.name, a.sb_props.tag, "Tag Action", 'KEYFRAME', idx))
+    idx += 1
     # add current action
     if context.active_object.animation_data and context.active_object.animation_data.action and \
             context.active_object.animation_data.action.sb_props.sprite != anim_sprite:
@@ -209,6 +210,24 @@ class SB_ObjectProperties(bpy.types.PropertyGroup):
         self.animations.remove(idx)
 
 
+@lru_cache(maxsize=1024)
+def _image_sync_name(name:str, fp:str, packed:bool, source:str, blend_path:str) -> str:
+    """Sync name of the image, computed from the raw property values. Path normalization is slow enough to show up in image lookups"""
+    if source:
+        # same as source_abs
+        return os.path.normpath(bpy.path.abspath(source) if source.startswith("//") else source)
+
+    if not packed and fp:
+        return os.path.normpath(bpy.path.abspath(fp) if fp.startswith("//") else fp)
+
+    return name
+
+
+def clear_cache():
+    """Forget cached values computed for the previous file"""
+    _image_sync_name.cache_clear()
+
+
 class SB_ImageProperties(bpy.types.PropertyGroup):
     """Pribambase image-related data"""
 
@@ -299,16 +318,8 @@ class SB_ImageProperties(bpy.types.PropertyGroup):
     @property
     def sync_name(self):
         img = self.id_data
-        fp = img.filepath
-        name = img.name
-
-        if img.sb_props.source:
-            name = os.path.normpath(img.sb_props.source_abs)
-
-        elif not img.packed_file and fp:
-            name = os.path.normpath(bpy.path.abspath(fp) if fp.startswith("//") else fp)
-
-        return name
+        # relative paths depend on where the blendfile is
+        return _image_sync_name(img.name, img.filepath, bool(img.packed_file), img.sb_props.source, bpy.data.filepath)
 
 
 class SB_ShaderNodeTreeProperties(bpy.types.PropertyGroup):
@@ -105,6 +105,7 @@ class Server():
         await self._ws.prepare(request)
 
         # client connected
+        util.forget_image_digests() # images could've been changed in blender in the meantime, the resend should overwrite them
         await self._ws.send_bytes(encode.texture_list(addon.state.identifier, addon.texture_list), False)
         bpy.ops.pribambase.report(message_type='INFO', message="Aseprite connected")
 
@@ -193,9 +194,12 @@ class UVWatch:
             # go sleep in several cases that do not imply sending the UVs
             if watched == 'NEVER' \
                     or ctx_mode not in ('EDIT', 'TEXTURE_PAINT') \
-                    or (watched == 'SHOWN' and not self.active_sprite_open(context)) \
-                    or addon.active_sprite_image is None \
-                    or ('SHOW_UV' not in addon.active_sprite_image.sb_props.sync_flags):
+                    or (watched == 'SHOWN' and not self.active_sprite_open(context)):
+                return self.PERIOD
+
+            # looking up the image scans all images, do it once per tick
+            active_image = addon.active_sprite_image
+            if active_image is None or ('SHOW_UV' not in active_image.sb_props.sync_flags):
                 return self.PERIOD
 
             changed = self.update_lines(context) or self.update_scene() # skip checks when waiting to send
@@ -224,10 +228,10 @@ class UVWatch:
         meshes = (obj.data for obj in context.view_layer.objects if obj.select_get() and obj.type == 'MESH' and obj.data)
         active_obj = context.view_layer.objects.active
         if active_obj and active_obj.type == 'MESH':
-            meshes = chain(meshes, [active_obj])
+            meshes = chain(meshes, [active_obj.data])
 
-        lines = frozenset(line for mesh in meshes for line in uv_lines(mesh, only_selected=not context.scene.tool_settings.use_uv_select_sync))
-        new_hash = hash(lines) if lines else 0
+        lines = uv_lines(meshes, only_selected=not context.scene.tool_settings.use_uv_select_sync)
+        new_hash = hash(lines.tobytes()) if lines.size else 0
         changed = (new_hash != self.last_hash)
         self.last_hash = new_hash
         return changed
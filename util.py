@@ -26,7 +26,9 @@ import os
 import tempfile
 import bpy
 import re
-from typing import Collection
+import hashlib
+import numpy as np
+from typing import Collection, Iterable, Union
 from contextlib import contextmanager
 
 from .addon import addon
@@ -49,15 +51,16 @@ def unique_name(name:str, collection:Collection[str]) -> str:
     return name
 
 
-def refresh():
-    """Tag the ui for redrawing"""
+def refresh(space_types:Iterable[str]=None):
+    """Tag the ui for redrawing. If space types are given, only redraw areas of those types"""
     ctx = bpy.context
-    if not ctx or not ctx.window_manager:
+    if bpy.app.background or not ctx or not ctx.window_manager:
         return
     
     for win in ctx.window_manager.windows:
         for area in win.screen.areas:
-            area.tag_redraw()
+            if space_types is None or area.type in space_types:
+                area.tag_redraw()
 
 
 def pack_empty_png(image:bpy.types.Image):
@@ -75,6 +78,57 @@ def pack_empty_png(image:bpy.types.Image):
     image.filepath_raw = ""
 
     os.remove(temp)
+    _image_digests.pop(image.name, None)
+
+
+def get_pixels(image:bpy.types.Image) -> np.ndarray:
+    """Copy image pixels to a flat float32 array"""
+    pixels = np.empty(image.size[0] * image.size[1] * image.channels, dtype=np.float32)
+    try:
+        # version >= 2.83; copies the whole block at once instead of boxing every float
+        image.pixels.foreach_get(pixels)
+    except AttributeError:
+        # version < 2.83
+        pixels[:] = image.pixels[:]
+    return pixels
+
+
+def set_pixels(image:bpy.types.Image, pixels:np.ndarray, digest:bytes=None):
+    """Replace image pixels with a flat float array of matching size. Pass digest of synced source data to allow skipping the same data next time"""
+    try:
+        # version >= 2.83; this is much faster
+        image.pixels.foreach_set(pixels)
+    except AttributeError:
+        # version < 2.83
+        image.pixels[:] = pixels
+
+    if digest is None:
+        _image_digests.pop(image.name, None)
+    else:
+        _image_digests[image.name] = digest
+
+
+# image name -> digest of the synced data last written to it, to skip writing the same data again
+_image_digests = {}
+
+def pixels_digest(data) -> bytes:
+    """Digest of the incoming 8-bit pixel data, hashing it is cheaper than rewriting the image"""
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def image_digest(image:bpy.types.Image) -> Union[bytes, None]:
+    """Digest of the synced data last written to the image, if nothing else changed its pixels since"""
+    return _image_digests.get(image.name)
+
+
+def forget_image_digests():
+    """Make next updates write pixels even if they're the same, must be called when image data might've been changed outside of sync"""
+    _image_digests.clear()
+
+
+def normalize_pixels(data) -> np.ndarray:
+    """Convert 8-bit color channels to floats in 0..1 range that blender uses, in a single pass. Keeps the shape of the array"""
+    return np.multiply(data, np.float32(1 / 255), dtype=np.float32)
 
 
 def image_nodata(image:bpy.types.Image) -> bool: